@@ -0,0 +1,127 @@
+from constants import *
+from collections import deque
+import cProfile
+import csv
+import io
+import json
+import pstats
+import time
+
+PHASES = ("events", "update", "draw")
+COUNTERS = ("distance_checks", "collision_checks")
+
+class Profiler:
+    """Times each phase of a frame and collects the per-fish check counters"""
+
+    def __init__(self, log_path=None):
+        self.frame = 0
+        self.current = {}
+        self.history = deque(maxlen=FPS)
+        self.show_hud = False
+        self.font = None
+
+        self.capture = None
+        self.capture_frames_left = 0
+        # Calls function on the thread being profiled; Game swaps this when simulating on a worker
+        self.run_capture = lambda function: function()
+
+        self.log_file = None
+        self.csv_writer = None
+        if log_path is not None:
+            self.log_file = open(log_path, "w", newline="")
+            if log_path.endswith(".csv"):
+                self.csv_writer = csv.DictWriter(self.log_file, ["frame", "fish", *PHASES, *COUNTERS])
+                self.csv_writer.writeheader()
+
+    def start_phase(self, name):
+        self.current[name] = time.perf_counter()
+
+    def end_phase(self, name):
+        self.current[name] = time.perf_counter() - self.current[name]
+
+    def add_phase(self, name, seconds):
+        """Record a phase that was timed elsewhere, such as on the simulation thread"""
+        self.current[name] = seconds
+
+    def end_frame(self, counter_source, fish):
+        """Record this frame, reading and resetting the counters on counter_source"""
+        record = {"frame": self.frame, "fish": fish}
+        for phase in PHASES:
+            record[phase] = round(self.current.get(phase, 0.0) * 1000, 3)
+        for counter in COUNTERS:
+            record[counter] = getattr(counter_source, counter)
+            setattr(counter_source, counter, 0)
+
+        self.history.append(record)
+        self.current.clear()
+        self.frame += 1
+
+        if self.log_file is not None:
+            if self.csv_writer is not None:
+                self.csv_writer.writerow(record)
+            else:
+                self.log_file.write(json.dumps(record) + "\n")
+
+        if self.capture is not None:
+            self.capture_frames_left -= 1
+            if self.capture_frames_left == 0:
+                self.run_capture(self.finish_capture)
+
+    def start_capture(self, frames=PROFILE_CAPTURE_FRAMES):
+        """Run cProfile over the next few frames, then dump the stats to a file"""
+        if self.capture is not None:
+            return
+
+        self.capture = cProfile.Profile()
+        self.capture_frames_left = frames
+        self.run_capture(self.capture.enable)
+
+    def finish_capture(self):
+        self.capture.disable()
+        path = time.strftime("profile-%Y%m%d-%H%M%S.prof")
+        self.capture.dump_stats(path)
+
+        summary = io.StringIO()
+        pstats.Stats(self.capture, stream=summary).sort_stats("cumulative").print_stats(15)
+        print(f"Saved cProfile capture to {path}")
+        print(summary.getvalue())
+
+        self.capture = None
+
+    def averages(self):
+        """Mean of every recorded field over the last second of frames"""
+        if not self.history:
+            return {}
+        return {key: sum(record[key] for record in self.history) / len(self.history)
+                for key in ("fish", *PHASES, *COUNTERS)}
+
+    def draw_hud(self, screen):
+        """Draw the averaged numbers in the top-left corner and return the area covered"""
+        if self.font is None:
+            self.font = pygame.font.SysFont("monospace", 14)
+
+        averages = self.averages()
+        lines = [f"fish {averages.get('fish', 0):.0f}"]
+        lines += [f"{phase:<7}{averages.get(phase, 0):7.2f} ms" for phase in PHASES]
+        lines += [f"{counter.split('_')[0]} checks {averages.get(counter, 0):,.0f}" for counter in COUNTERS]
+        if self.capture is not None:
+            lines.append(f"cProfile: {self.capture_frames_left} frames left")
+
+        rendered = [self.font.render(line, True, (255, 255, 255)) for line in lines]
+        width = max(surface.get_width() for surface in rendered) + 12
+        height = sum(surface.get_height() for surface in rendered) + 12
+
+        area = pygame.Rect(10, 10, width, height)
+        screen.fill((0, 0, 0), area)
+        y = area.y + 6
+        for surface in rendered:
+            screen.blit(surface, (area.x + 6, y))
+            y += surface.get_height()
+        return area
+
+    def close(self):
+        if self.capture is not None:
+            self.finish_capture()
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
@@ -0,0 +1,28 @@
+from constants import *
+from SpatialGrid import SpatialGrid
+
+class Seabed:
+    """Dead fish that have come to rest, kept out of the per-tick loops as static obstacles"""
+
+    def __init__(self):
+        self.fish = []
+        self.grid = SpatialGrid()
+        # Highest point of the pile; nothing above it can touch a settled fish
+        self.top = float('inf')
+
+    def add(self, tetra):
+        self.fish.append(tetra)
+        self.grid.insert(tetra)
+        self.top = min(self.top, tetra.rect.top)
+
+    def collides(self, x, y):
+        """Would a creature rect at (x, y) overlap any settled fish?"""
+        if y + CREATURE_SIZE_Y <= self.top:
+            return False
+
+        rect = pygame.Rect(x, y, CREATURE_SIZE_X, CREATURE_SIZE_Y)
+        for fish in self.grid.nearby(x - CREATURE_SIZE_X - 2, y - CREATURE_SIZE_Y - 2,
+                                     x + CREATURE_SIZE_X + 2, y + CREATURE_SIZE_Y + 2):
+            if rect.colliderect(fish.rect):
+                return True
+        return False
@@ -0,0 +1,123 @@
+from constants import *
+import queue
+import threading
+import time
+
+from Profiler import COUNTERS
+
+class Frame:
+    """What the renderer needs from one moment of the pond, copied out of the live state
+
+    Only the check counters change after publishing: the Profiler reads and zeroes
+    them so a frame drawn twice is counted once.
+    """
+
+    def __init__(self, tick, published, positions, colors, links, corpses, update_time, counters):
+        self.tick = tick
+        self.published = published
+        self.positions = positions
+        self.colors = colors
+        # (fish, neighbor) indices into positions, so lines can follow the eased fish
+        self.links = links
+        self.corpses = corpses
+        self.update_time = update_time
+        for name, value in counters.items():
+            setattr(self, name, value)
+
+    def rects_at(self, previous, now):
+        """Fish rects at time now, eased from previous towards this frame"""
+        alpha = 1.0
+        # Fish only ever leave the list, so equal lengths mean the same fish in the same order
+        if previous is not None and len(previous.positions) == len(self.positions):
+            span = self.published - previous.published
+            if span > 0:
+                alpha = min(1.0, (now - self.published) / span)
+
+        if alpha >= 1.0:
+            return [pygame.Rect(x, y, CREATURE_SIZE_X, CREATURE_SIZE_Y) for x, y in self.positions]
+        return [pygame.Rect(old_x + (x - old_x) * alpha, old_y + (y - old_y) * alpha, CREATURE_SIZE_X, CREATURE_SIZE_Y)
+                for (old_x, old_y), (x, y) in zip(previous.positions, self.positions)]
+
+class SimulationThread(threading.Thread):
+    """Runs Game.update at FPS * warp ticks per second and publishes a Frame FPS times a second
+
+    Frames go out on the wall clock whatever the warp, so a slow pond shows fewer ticks
+    per frame rather than fewer frames. The two newest frames are swapped in together
+    under a lock, so the renderer always gets a consistent pair to interpolate between
+    and never sees a half-updated pond.
+    """
+
+    def __init__(self, game, warp=1):
+        super().__init__(name="simulation", daemon=True)
+        self.game = game
+        self.warp = warp
+        self.lock = threading.Lock()
+        self.previous = None
+        self.latest = None
+        # Copies of every settled corpse rect; only appended to, so the renderer can
+        # read the first frame.corpses of them without taking the lock
+        self.corpses = []
+        self.commands = queue.SimpleQueue()
+        self.stopping = threading.Event()
+        self.error = None
+
+    def run(self):
+        try:
+            next_tick = next_publish = time.perf_counter()
+            update_time = 0.0
+            # Stop requests and queued commands are seen between any two ticks
+            while not self.stopping.is_set():
+                while not self.commands.empty():
+                    self.commands.get()()
+
+                now = time.perf_counter()
+                if now >= next_publish:
+                    self.publish(update_time)
+                    update_time = 0.0
+                    next_publish = now + 1 / FPS
+
+                if now < next_tick:
+                    self.stopping.wait(min(next_tick, next_publish) - now)
+                    continue
+
+                # Timed on its own so publishing is not counted as update time
+                start = time.perf_counter()
+                self.game.update()
+                update_time += time.perf_counter() - start
+
+                # A pond too big to keep up just runs flat out instead of building a backlog
+                next_tick = max(next_tick + 1 / (FPS * self.warp), now)
+        except BaseException as error:
+            self.error = error
+
+    def publish(self, update_time):
+        game = self.game
+        rects, colors = game.creature_layout()
+        links = tuple(game.connection_links()) if game.show_connections else ()
+        self.corpses.extend(rect.copy() for rect in game.settled_rects(len(self.corpses)))
+
+        counter_source = game.counter_source()
+        counters = {}
+        for name in COUNTERS:
+            counters[name] = getattr(counter_source, name)
+            setattr(counter_source, name, 0)
+
+        frame = Frame(game.tick, time.perf_counter(), tuple((rect.x, rect.y) for rect in rects), tuple(colors),
+                      links, len(self.corpses), update_time, counters)
+        with self.lock:
+            self.previous, self.latest = self.latest, frame
+
+    def frames(self):
+        """(previous, latest) published frames; re-raises whatever stopped the worker"""
+        if self.error is not None:
+            raise self.error
+        with self.lock:
+            return self.previous, self.latest
+
+    def call(self, function):
+        """Run function on the worker between two ticks, when the pond is not mid-update"""
+        self.commands.put(function)
+
+    def stop(self):
+        self.stopping.set()
+        self.join()
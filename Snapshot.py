@@ -0,0 +1,256 @@
+from constants import *
+import constants
+from array import array
+from Tetra import Tetra
+from Seabed import Seabed
+import json
+import os
+import random
+import struct
+import sys
+
+SNAPSHOT_MAGIC = b"VPSNAP1\n"
+STREAM_MAGIC = b"VPTICK1\n"
+
+# Per-fish columns of a snapshot, stored as one packed array each
+SNAPSHOT_FIELDS = [
+    ("x", "d"), ("y", "d"),
+    ("direction_x", "d"), ("direction_y", "d"),
+    ("color_r", "B"), ("color_g", "B"), ("color_b", "B"),
+    ("max_speed", "d"), ("current_speed", "d"),
+    ("hunger", "d"), ("hunger_decay_base", "d"),
+    ("alive", "B"), ("settled", "B"),
+]
+
+# Per-fish columns of each tick-stream record; colors are static and live in the header
+STREAM_FIELDS = [("x", "f"), ("y", "f"), ("hunger", "f"), ("alive", "B")]
+TICK_HEADER = struct.Struct("<q")
+
+def write_array(f, typecode, values):
+    data = array(typecode, values)
+    if sys.byteorder == "big":
+        data.byteswap()
+    f.write(data.tobytes())
+
+def read_array(f, typecode, count):
+    data = array(typecode)
+    data.frombytes(f.read(count * data.itemsize))
+    if len(data) != count:
+        raise EOFError("truncated pond file")
+    if sys.byteorder == "big":
+        data.byteswap()
+    return data
+
+def write_header(f, magic, header):
+    encoded = json.dumps(header).encode()
+    f.write(magic)
+    f.write(struct.pack("<I", len(encoded)))
+    f.write(encoded)
+
+def read_header(f, magic):
+    if f.read(len(magic)) != magic:
+        raise ValueError(f"not a pond file: {f.name}")
+    length, = struct.unpack("<I", f.read(4))
+    return json.loads(f.read(length))
+
+def population_columns(game):
+    """Column name -> list of values for every fish, in creature order"""
+    if game.school is not None:
+        school = game.school
+        return {
+            "x": school.x.tolist(), "y": school.y.tolist(),
+            "direction_x": school.direction[:, 0].tolist(), "direction_y": school.direction[:, 1].tolist(),
+            "color_r": school.color[:, 0].tolist(), "color_g": school.color[:, 1].tolist(),
+            "color_b": school.color[:, 2].tolist(),
+            "max_speed": school.max_speed.tolist(), "current_speed": school.current_speed.tolist(),
+            "hunger": school.hunger.tolist(), "hunger_decay_base": [school.hunger_decay_base] * school.count,
+            "alive": school.is_alive.tolist(), "settled": school.settled.tolist(),
+        }
+
+    creatures = game.all_fish
+    return {
+        "x": [c.x for c in creatures], "y": [c.y for c in creatures],
+        "direction_x": [c.direction[0] for c in creatures], "direction_y": [c.direction[1] for c in creatures],
+        "color_r": [c.color[0] for c in creatures], "color_g": [c.color[1] for c in creatures],
+        "color_b": [c.color[2] for c in creatures],
+        "max_speed": [c.max_speed for c in creatures], "current_speed": [c.current_speed for c in creatures],
+        "hunger": [c.hunger for c in creatures], "hunger_decay_base": [c.hunger_decay_base for c in creatures],
+        "alive": [c.isAlive for c in creatures], "settled": [c.settled for c in creatures],
+    }
+
+def stream_columns(game):
+    """The STREAM_FIELDS columns only, cheap enough to take every tick"""
+    if game.school is not None:
+        school = game.school
+        return {"x": school.x.tolist(), "y": school.y.tolist(),
+                "hunger": school.hunger.tolist(), "alive": school.is_alive.tolist()}
+
+    creatures = game.all_fish
+    return {"x": [c.x for c in creatures], "y": [c.y for c in creatures],
+            "hunger": [c.hunger for c in creatures], "alive": [c.isAlive for c in creatures]}
+
+def save_snapshot(game, path):
+    """Write the full pond state, RNG included, so the run can be resumed later"""
+    columns = population_columns(game)
+    version, internal_state, gauss_next = random.getstate()
+    header = {
+        "engine": game.engine,
+        "count": len(columns["x"]),
+        "tick": game.tick,
+        "world_size": [constants.SCREEN_WIDTH, constants.SCREEN_HEIGHT],
+        "python_random": {"version": version, "gauss_next": gauss_next},
+        "numpy_random": game.school.rng.bit_generator.state if game.school is not None else None,
+    }
+
+    # Write beside the target and swap in, so a crash never leaves half a snapshot
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        write_header(f, SNAPSHOT_MAGIC, header)
+        for name, typecode in SNAPSHOT_FIELDS:
+            write_array(f, typecode, columns[name])
+        write_array(f, "I", internal_state)
+    os.replace(temp_path, path)
+
+def load_snapshot(game, path):
+    """Replace the game's population and RNG state with those saved in path"""
+    with open(path, "rb") as f:
+        header = read_header(f, SNAPSHOT_MAGIC)
+        count = header["count"]
+        columns = {name: read_array(f, typecode, count) for name, typecode in SNAPSHOT_FIELDS}
+        internal_state = tuple(read_array(f, "I", 625))
+
+    constants.set_world_size(*header["world_size"])
+    # The pond carries on in the engine that saved it, whatever the game was created with
+    game.engine = header["engine"]
+    game.tick = header["tick"]
+    game.background = None
+
+    if game.engine == "numpy":
+        import numpy as np
+        from TetraSchool import TetraSchool
+
+        school = TetraSchool(count)
+        school.x = np.array(columns["x"])
+        school.y = np.array(columns["y"])
+        school.direction = np.column_stack((columns["direction_x"], columns["direction_y"]))
+        school.color = np.column_stack((columns["color_r"], columns["color_g"], columns["color_b"])).astype(np.int64)
+        school.max_speed = np.array(columns["max_speed"])
+        school.current_speed = np.array(columns["current_speed"])
+        school.hunger = np.array(columns["hunger"])
+        # Saved per fish, but the school keeps one value; it is the same for every fish
+        if count:
+            school.hunger_decay_base = columns["hunger_decay_base"][0]
+        school.is_alive = np.array(columns["alive"], dtype=bool)
+        settled = np.flatnonzero(np.array(columns["settled"], dtype=bool))
+        if len(settled):
+            school.settle(settled)
+        if header["numpy_random"] is not None:
+            school.rng.bit_generator.state = header["numpy_random"]
+        game.school = school
+        game.creatures = school.views
+        game.all_fish = game.creatures
+    else:
+        game.creatures.clear()
+        game.all_fish = []
+        game.seabed = Seabed()
+        for i in range(count):
+            tetra = Tetra(columns["x"][i], columns["y"][i], game.creatures, game.grid, game.seabed)
+            tetra.direction = (columns["direction_x"][i], columns["direction_y"][i])
+            tetra.color = (columns["color_r"][i], columns["color_g"][i], columns["color_b"][i])
+            tetra.max_speed = columns["max_speed"][i]
+            tetra.current_speed = columns["current_speed"][i]
+            tetra.hunger = columns["hunger"][i]
+            tetra.hunger_decay_base = columns["hunger_decay_base"][i]
+            tetra.isAlive = bool(columns["alive"][i])
+            tetra.settled = bool(columns["settled"][i])
+            # Assigned like move() does: Rect() truncates floats but assignment rounds them
+            tetra.rect.x = tetra.x
+            tetra.rect.y = tetra.y
+            if tetra.settled:
+                game.seabed.add(tetra)
+            else:
+                game.creatures.append(tetra)
+            game.all_fish.append(tetra)
+
+    # Restored last: building the Tetras above draws from the generator
+    python_random = header["python_random"]
+    random.setstate((python_random["version"], internal_state, python_random["gauss_next"]))
+
+class TickRecorder:
+    """Appends one fixed-size record of positions, hunger and alive flags per tick"""
+
+    def __init__(self, path, game):
+        columns = population_columns(game)
+        self.count = len(columns["x"])
+        self.file = open(path, "wb")
+        write_header(self.file, STREAM_MAGIC, {
+            "count": self.count,
+            "world_size": [constants.SCREEN_WIDTH, constants.SCREEN_HEIGHT],
+        })
+        for channel in ("color_r", "color_g", "color_b"):
+            write_array(self.file, "B", columns[channel])
+
+    def record(self, game):
+        columns = stream_columns(game)
+        self.file.write(TICK_HEADER.pack(game.tick))
+        for name, typecode in STREAM_FIELDS:
+            write_array(self.file, typecode, columns[name])
+
+    def close(self):
+        self.file.close()
+
+class RecordedFish:
+    """Just enough of a Tetra for Game.draw to show a replayed fish"""
+
+    def __init__(self, color):
+        self.color = color
+        self.x = 0.0
+        self.y = 0.0
+        self.hunger = 0.0
+        self.isAlive = True
+        self.nearest_neighbor = None
+        self.rect = pygame.Rect(0, 0, CREATURE_SIZE_X, CREATURE_SIZE_Y)
+
+class TickReplay:
+    """Reads a tick stream back, seeking straight to any recorded tick"""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        header = read_header(self.file, STREAM_MAGIC)
+        self.count = header["count"]
+        self.world_size = header["world_size"]
+
+        channels = [read_array(self.file, "B", self.count) for _ in range(3)]
+        self.colors = list(zip(*channels))
+
+        self.data_start = self.file.tell()
+        self.record_size = TICK_HEADER.size + sum(array(typecode).itemsize * self.count
+                                                  for _, typecode in STREAM_FIELDS)
+        # A crash mid-write leaves a partial record at the end; it is simply ignored
+        self.length = (os.path.getsize(path) - self.data_start) // self.record_size
+        self.position = 0
+
+    def make_fish(self):
+        return [RecordedFish(color) for color in self.colors]
+
+    def advance(self, fish, ticks=1):
+        """Jump ahead by ticks records and copy that record onto fish; returns its tick"""
+        if self.length == 0:
+            return None
+
+        self.position = min(self.position + ticks, self.length)
+        self.file.seek(self.data_start + (self.position - 1) * self.record_size)
+
+        tick, = TICK_HEADER.unpack(self.file.read(TICK_HEADER.size))
+        x, y, hunger, alive = (read_array(self.file, typecode, self.count) for _, typecode in STREAM_FIELDS)
+        for i, creature in enumerate(fish):
+            creature.x = x[i]
+            creature.y = y[i]
+            creature.hunger = hunger[i]
+            creature.isAlive = bool(alive[i])
+            creature.rect.x = x[i]
+            creature.rect.y = y[i]
+        return tick
+
+    def close(self):
+        self.file.close()
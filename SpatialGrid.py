@@ -0,0 +1,123 @@
+from constants import *
+
+class SpatialGrid:
+    """Uniform grid bucketing tetras by the cell their top-left corner falls in"""
+
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.cell_of = {}
+        # Position of each tetra in the creature list, so ties resolve like a list scan
+        self.order = {}
+
+    def cell_key(self, x, y):
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def rebuild(self, tetras):
+        """Re-bucket every tetra from scratch"""
+        self.cells.clear()
+        self.cell_of.clear()
+        self.order.clear()
+
+        for index, tetra in enumerate(tetras):
+            key = self.cell_key(tetra.x, tetra.y)
+            self.cells.setdefault(key, []).append(tetra)
+            self.cell_of[tetra] = key
+            self.order[tetra] = index
+
+    def insert(self, tetra):
+        """Add one tetra after everything already in the grid"""
+        key = self.cell_key(tetra.x, tetra.y)
+        self.cells.setdefault(key, []).append(tetra)
+        self.cell_of[tetra] = key
+        self.order[tetra] = len(self.order)
+
+    def update(self, tetra):
+        """Move a tetra to the bucket matching its current position"""
+        key = self.cell_key(tetra.x, tetra.y)
+        old_key = self.cell_of[tetra]
+        if key == old_key:
+            return
+
+        bucket = self.cells[old_key]
+        bucket.remove(tetra)
+        if not bucket:
+            del self.cells[old_key]
+
+        self.cells.setdefault(key, []).append(tetra)
+        self.cell_of[tetra] = key
+
+    def nearby(self, left, top, right, bottom):
+        """Yield tetras bucketed in any cell overlapping the given area"""
+        min_cx, min_cy = self.cell_key(left, top)
+        max_cx, max_cy = self.cell_key(right, bottom)
+
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket:
+                    yield from bucket
+
+    def nearest(self, tetra):
+        """Return (neighbor, distance, distances computed) for the closest other tetra
+
+        neighbor is None and distance is inf when there is no other tetra.
+        """
+        cx, cy = self.cell_of[tetra]
+        best = None
+        best_distance = float('inf')
+        best_order = None
+        cells_visited = 0
+        checks = 0
+        ring = 0
+
+        while True:
+            for key in self._ring(cx, cy, ring):
+                cells_visited += 1
+                for other in self.cells.get(key, ()):
+                    if other is tetra:
+                        continue
+                    distance = tetra.calculate_distance(other)
+                    checks += 1
+                    order = self.order[other]
+                    if distance < best_distance or (distance == best_distance and order < best_order):
+                        best = other
+                        best_distance = distance
+                        best_order = order
+
+            # Anything outside the rings searched so far is further than ring * cell_size
+            if best_distance <= ring * self.cell_size:
+                return best, best_distance, checks
+
+            # Sparse ponds: scanning empty cells costs more than scanning every tetra
+            if cells_visited > len(self.order):
+                best, best_distance = self._nearest_by_scan(tetra)
+                return best, best_distance, checks + len(self.order) - 1
+
+            ring += 1
+
+    def _nearest_by_scan(self, tetra):
+        best = None
+        best_distance = float('inf')
+
+        for other in self.order:
+            if other is not tetra:
+                distance = tetra.calculate_distance(other)
+                if distance < best_distance:
+                    best = other
+                    best_distance = distance
+
+        return best, best_distance
+
+    @staticmethod
+    def _ring(cx, cy, ring):
+        if ring == 0:
+            yield (cx, cy)
+            return
+
+        for dx in range(-ring, ring + 1):
+            yield (cx + dx, cy - ring)
+            yield (cx + dx, cy + ring)
+        for dy in range(-ring + 1, ring):
+            yield (cx - ring, cy + dy)
+            yield (cx + ring, cy + dy)
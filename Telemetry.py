@@ -0,0 +1,150 @@
+from constants import *
+from collections import deque
+import json
+import os
+
+# Nearest-neighbor distance percentiles reported in every record
+NEAREST_PERCENTILES = (10, 50, 90)
+
+def creature_health(creatures):
+    """Telemetry sample of the live Tetras in creatures, matching TetraSchool.health"""
+    histogram = [0] * TELEMETRY_HUNGER_BINS
+    speeds = []
+    distances = []
+    for creature in creatures:
+        if creature.isAlive:
+            histogram[min(int(creature.hunger * TELEMETRY_HUNGER_BINS / 100), TELEMETRY_HUNGER_BINS - 1)] += 1
+            speeds.append(creature.current_speed)
+            # Already current: every live Tetra looks up its neighbor as it moves
+            if creature.nearest_distance < float('inf'):
+                distances.append(creature.nearest_distance)
+
+    return {
+        "alive": len(speeds),
+        "hunger_histogram": histogram,
+        "speed_mean": sum(speeds) / len(speeds) if speeds else None,
+        "speed_min": min(speeds) if speeds else None,
+        "distances": sorted(distances),
+    }
+
+def measure(game):
+    """One sample of population health, already reduced to a few numbers per metric"""
+    if game.school is not None:
+        sample = game.school.health(TELEMETRY_HUNGER_BINS, TELEMETRY_NEIGHBOR_QUERIES)
+    else:
+        sample = creature_health(game.creatures)
+
+    # Reversals are counted by the engines every tick; taking them resets the count
+    source = game.counter_source()
+    sample["collision_reversals"] = source.collision_reversals
+    source.collision_reversals = 0
+
+    sample["tick"] = game.tick
+    sample["fish"] = len(game.all_fish)
+    return sample
+
+def primed(stage):
+    """Advance a pipeline stage to its first yield so it is ready for send()"""
+    next(stage)
+    return stage
+
+def summarize(target, previous_tick):
+    """Pipeline stage: turn each sample sent in into a flat record and send that on"""
+    while True:
+        sample = yield
+        distances = sample.pop("distances")
+        record = {
+            "tick": sample["tick"],
+            "ticks": sample["tick"] - previous_tick,
+            "alive": sample["alive"],
+            "dead": sample["fish"] - sample["alive"],
+            "hunger_histogram": sample["hunger_histogram"],
+            "speed_mean": sample["speed_mean"],
+            "speed_min": sample["speed_min"],
+            "collision_reversals": sample["collision_reversals"],
+            "nearest_mean": sum(distances) / len(distances) if distances else None,
+            "nearest_min": distances[0] if distances else None,
+            "nearest_max": distances[-1] if distances else None,
+        }
+        # Nearest-rank percentiles: the ceil(p / 100 * n)-th smallest distance
+        for percentile in NEAREST_PERCENTILES:
+            rank = -(-len(distances) * percentile // 100)
+            record[f"nearest_p{percentile}"] = distances[rank - 1] if distances else None
+
+        previous_tick = sample["tick"]
+        target.send(record)
+
+def fan_out(sinks):
+    """Pipeline stage: hand every record sent in to each sink"""
+    while True:
+        record = yield
+        for sink in sinks:
+            sink.write(record)
+
+class RingBuffer:
+    """Sink keeping the newest records in memory"""
+
+    def __init__(self, capacity=TELEMETRY_RING_SIZE):
+        self.records = deque(maxlen=capacity)
+
+    def write(self, record):
+        self.records.append(record)
+
+    def latest(self):
+        return self.records[-1] if self.records else None
+
+    def close(self):
+        pass
+
+class RollingFile:
+    """Sink writing JSON lines, moving path to path.1, path.2... as each file fills up"""
+
+    def __init__(self, path, max_bytes=TELEMETRY_FILE_BYTES, backups=TELEMETRY_FILE_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.file = open(path, "w")
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + "\n")
+        if self.file.tell() >= self.max_bytes:
+            self.roll()
+
+    def roll(self):
+        self.file.close()
+        for number in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{number}"):
+                os.replace(f"{self.path}.{number}", f"{self.path}.{number + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        self.file = open(self.path, "w")
+
+    def close(self):
+        self.file.close()
+
+class Telemetry:
+    """Samples population health every few ticks and streams the records to sinks
+
+    Per tick this costs one modulo; the engines count collision reversals as they
+    go and everything else is measured and summarised only once per batch.
+    """
+
+    def __init__(self, sinks, every=TELEMETRY_EVERY):
+        self.sinks = sinks
+        self.every = every
+        self.pipeline = None
+
+    def start(self, game):
+        """Begin counting from the game's current tick, once its population exists"""
+        game.counter_source().collision_reversals = 0
+        self.pipeline = primed(summarize(primed(fan_out(self.sinks)), game.tick))
+
+    def tick(self, game):
+        if game.tick % self.every == 0:
+            self.pipeline.send(measure(game))
+
+    def close(self):
+        if self.pipeline is not None:
+            self.pipeline.close()
+        for sink in self.sinks:
+            sink.close()
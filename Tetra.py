@@ -1,8 +1,15 @@
 from constants import *
+import constants
 import random
 
 class Tetra:
-    def __init__(self, x, y, all_tetras):
+    # Work counters summed over every tetra, read and reset by the Profiler
+    distance_checks = 0
+    collision_checks = 0
+    # Fish turned around by check_collision_ahead, read and reset by Telemetry
+    collision_reversals = 0
+
+    def __init__(self, x, y, all_tetras, grid=None, seabed=None):
         self.x = x
         self.y = y
         self.direction = random.choice([(0, 1), (0, -1), (1, 0), (-1, 0)])
@@ -11,14 +18,18 @@ class Tetra:
         self.nearest_neighbor = None
         self.nearest_distance = float('inf')
         self.all_tetras = all_tetras
+        self.grid = grid
+        self.seabed = seabed
         self.collision_distance = CREATURE_SIZE_X
 
         # Variables for hunger and speed system
-        self.max_speed = random.uniform(0.8, 1.2)
+        self.max_speed = constants.CREATURE_SPEED * random.uniform(*constants.MAX_SPEED_RANGE)
         self.current_speed = self.max_speed
         self.hunger = 50
-        self.hunger_decay_base = 0.01
+        self.hunger_decay_base = constants.HUNGER_DECAY_BASE
         self.isAlive = True
+        # Set once a dead fish comes to rest; Game then moves it onto the seabed
+        self.settled = False
 
     def update_hunger_and_speed(self):
         if not self.isAlive:
@@ -39,24 +50,55 @@ class Tetra:
             self.current_speed = 0
             self.isAlive = False
 
-    def will_collide(self, new_x, new_y, other_tetra):
+    def collision_candidates(self, new_x, new_y):
+        if self.grid is None:
+            return self.all_tetras
+
+        # Pad by a couple of pixels since rects hold rounded copies of x and y
+        return self.grid.nearby(new_x - CREATURE_SIZE_X - 2, new_y - CREATURE_SIZE_Y - 2,
+                                new_x + CREATURE_SIZE_X + 2, new_y + CREATURE_SIZE_Y + 2)
+
+    def is_jammed(self, new_x, new_y, sink_speed):
+        """True if everything blocking this corpse is a corpse that can never get out of the way"""
         future_rect = pygame.Rect(new_x, new_y, CREATURE_SIZE_X, CREATURE_SIZE_Y)
-        return future_rect.colliderect(other_tetra.rect)
+
+        for other in self.collision_candidates(new_x, new_y):
+            if other is self or not future_rect.colliderect(other.rect):
+                continue
+            if other.isAlive:
+                return False
+            # Two corpses that each block the other's sinking are stuck for good
+            other_future = pygame.Rect(other.x, other.y + sink_speed, CREATURE_SIZE_X, CREATURE_SIZE_Y)
+            if not (other.settled or other_future.colliderect(self.rect)):
+                return False
+        return True
 
     def check_collision_ahead(self, new_x, new_y):
-        for other in self.all_tetras:
-            if other != self:
-                if self.will_collide(new_x, new_y, other):
-                    return True
-        return False
+        return self.touches_seabed(new_x, new_y) or self.hits_fish(new_x, new_y)
+
+    def touches_seabed(self, new_x, new_y):
+        return self.seabed is not None and self.seabed.collides(new_x, new_y)
+
+    def hits_fish(self, new_x, new_y):
+        future_rect = pygame.Rect(new_x, new_y, CREATURE_SIZE_X, CREATURE_SIZE_Y)
+
+        checks = 0
+        hit = False
+        for checks, other in enumerate(self.collision_candidates(new_x, new_y), 1):
+            if other is not self and future_rect.colliderect(other.rect):
+                hit = True
+                break
+
+        Tetra.collision_checks += checks
+        return hit
 
     def move(self):
         if self.isAlive:
             self.update_hunger_and_speed()
             self.find_nearest_neighbor()
 
-            if random.random() < 0.02:
-                if random.random() < 0.6 and self.nearest_neighbor:
+            if random.random() < constants.TURN_CHANCE:
+                if random.random() < constants.FOLLOW_CHANCE and self.nearest_neighbor:
                     if (self.nearest_distance > 30):
                         self.direction = self.calculate_direction_to_neighbor()
                 else:
@@ -66,21 +108,22 @@ class Tetra:
             new_y = self.y + (self.direction[1] * self.current_speed)
 
             if self.check_collision_ahead(new_x, new_y):
+                Tetra.collision_reversals += 1
                 self.direction = (-self.direction[0], -self.direction[1])
                 new_x = self.x + (self.direction[0] * self.current_speed)
                 new_y = self.y + (self.direction[1] * self.current_speed)
 
-            if SWIM_ZONE_LEFT <= new_x < SWIM_ZONE_RIGHT - CREATURE_SIZE_X:
+            if constants.SWIM_ZONE_LEFT <= new_x < constants.SWIM_ZONE_RIGHT - CREATURE_SIZE_X:
                 self.x = new_x
             else:
                 self.direction = (-self.direction[0], self.direction[1])
-                self.x = max(SWIM_ZONE_LEFT, min(self.x, SWIM_ZONE_RIGHT - CREATURE_SIZE_X))
+                self.x = max(constants.SWIM_ZONE_LEFT, min(self.x, constants.SWIM_ZONE_RIGHT - CREATURE_SIZE_X))
 
-            if SWIM_ZONE_TOP <= new_y < SWIM_ZONE_BOTTOM - CREATURE_SIZE_Y:
+            if constants.SWIM_ZONE_TOP <= new_y < constants.SWIM_ZONE_BOTTOM - CREATURE_SIZE_Y:
                 self.y = new_y
             else:
                 self.direction = (self.direction[0], -self.direction[1])
-                self.y = max(SWIM_ZONE_TOP, min(self.y, SWIM_ZONE_BOTTOM - CREATURE_SIZE_Y))
+                self.y = max(constants.SWIM_ZONE_TOP, min(self.y, constants.SWIM_ZONE_BOTTOM - CREATURE_SIZE_Y))
         else:
             sink_speed = 0.2
             self.direction = (0, 1)
@@ -88,21 +131,35 @@ class Tetra:
             new_x = self.x
             new_y = self.y + (self.direction[1] * sink_speed)
 
-            if self.check_collision_ahead(new_x, new_y):
+            # The seabed is looked up once: it both blocks the corpse and settles it
+            on_seabed = self.touches_seabed(new_x, new_y)
+            if on_seabed or self.hits_fish(new_x, new_y):
+                # Blocked for good: on the settled pile, or wedged into other corpses
+                self.settled = on_seabed or self.is_jammed(new_x, new_y, sink_speed)
                 new_y = self.y
             
-            if SWIM_ZONE_LEFT <= new_x < SWIM_ZONE_RIGHT - CREATURE_SIZE_X:
+            if constants.SWIM_ZONE_LEFT <= new_x < constants.SWIM_ZONE_RIGHT - CREATURE_SIZE_X:
                 self.x = new_x
                 
-            if new_y < SWIM_ZONE_BOTTOM - CREATURE_SIZE_Y:
+            if new_y < constants.SWIM_ZONE_BOTTOM - CREATURE_SIZE_Y:
                 self.y = new_y
             else:
-                self.y = SWIM_ZONE_BOTTOM - CREATURE_SIZE_Y
+                self.y = constants.SWIM_ZONE_BOTTOM - CREATURE_SIZE_Y
+
+            if self.y >= constants.SWIM_ZONE_BOTTOM - CREATURE_SIZE_Y:
+                self.settled = True
 
         self.rect.x = self.x
         self.rect.y = self.y
 
     def find_nearest_neighbor(self):
+        if self.grid is not None:
+            self.nearest_neighbor, self.nearest_distance, checks = self.grid.nearest(self)
+            Tetra.distance_checks += checks
+            return
+
+        Tetra.distance_checks += len(self.all_tetras) - 1
+
         self.nearest_distance = float('inf')
         self.nearest_neighbor = None
         
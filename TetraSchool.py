@@ -0,0 +1,427 @@
+import numpy as np
+
+from constants import *
+import constants
+
+DIRECTIONS = np.array([(0, 1), (0, -1), (1, 0), (-1, 0)], dtype=float)
+SINK_SPEED = 0.2
+
+
+def neighbor_pairs(query_x, query_y, x, y, cell_size):
+    """Yield (query, point) index pairs for points in the 3x3 cells around each query.
+
+    Pairs come one neighboring cell at a time, grouped by query and with points in
+    ascending index order inside each group.
+    """
+    if len(x) == 0 or len(query_x) == 0:
+        return
+
+    cell_x = np.floor(x / cell_size).astype(np.int64)
+    cell_y = np.floor(y / cell_size).astype(np.int64)
+    min_x, min_y = cell_x.min(), cell_y.min()
+    rows = cell_y.max() - min_y + 3
+
+    # Shift everything by one cell so the -1 offsets never wrap into another column
+    columns = cell_x.max() - min_x + 3
+    keys = (cell_x - min_x + 1) * rows + (cell_y - min_y + 1)
+    order = np.argsort(keys, kind='stable')
+    cell_start = np.concatenate(([0], np.cumsum(np.bincount(keys, minlength=columns * rows))))
+
+    # Clamping queries to the padded area can only add candidates, never lose them
+    query_cx = np.clip(np.floor(query_x / cell_size).astype(np.int64) - min_x + 1, 1, columns - 2)
+    query_cy = np.clip(np.floor(query_y / cell_size).astype(np.int64) - min_y + 1, 1, rows - 2)
+    yield from cell_pairs(query_cx, query_cy, rows, cell_start, order)
+
+
+def cell_pairs(query_cx, query_cy, rows, cell_start, order):
+    """Yield (query, point) pairs for the 3x3 cells around each query's cell.
+
+    Cell (cx, cy) holds order[cell_start[key]:cell_start[key + 1]] with key = cx * rows + cy.
+    """
+    query_index = np.arange(len(query_cx))
+
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            neighbor_keys = (query_cx + dx) * rows + (query_cy + dy)
+            start = cell_start[neighbor_keys]
+            counts = cell_start[neighbor_keys + 1] - start
+            total = counts.sum()
+            if total == 0:
+                continue
+
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            yield np.repeat(query_index, counts), order[np.repeat(start, counts) + offsets]
+
+
+class StaticCells:
+    """Cell index over points that never move, covering the whole world so it can grow in place"""
+
+    def __init__(self, cell_size, width, height):
+        self.cell_size = cell_size
+        # A padding cell on every side so 3x3 lookups never wrap into another column
+        self.columns = int(width // cell_size) + 3
+        self.rows = int(height // cell_size) + 3
+        self.keys = np.empty(0, dtype=np.int64)
+        self.order = np.empty(0, dtype=np.int64)
+        self.cell_start = np.zeros(self.columns * self.rows + 1, dtype=np.int64)
+
+    def cells(self, x, y):
+        cx = np.clip(np.floor(x / self.cell_size).astype(np.int64) + 1, 1, self.columns - 2)
+        cy = np.clip(np.floor(y / self.cell_size).astype(np.int64) + 1, 1, self.rows - 2)
+        return cx, cy
+
+    def add(self, indices, x, y):
+        """Insert points without re-sorting the ones already indexed"""
+        cx, cy = self.cells(x, y)
+        keys = cx * self.rows + cy
+        by_key = np.argsort(keys, kind='stable')
+        keys = keys[by_key]
+
+        at = np.searchsorted(self.keys, keys, side='right')
+        self.keys = np.insert(self.keys, at, keys)
+        self.order = np.insert(self.order, at, indices[by_key])
+        self.cell_start[1:] += np.cumsum(np.bincount(keys, minlength=self.columns * self.rows))
+
+    def pairs(self, query_x, query_y):
+        """Like neighbor_pairs, with points given by their own indices"""
+        if len(self.order) == 0 or len(query_x) == 0:
+            return
+        query_cx, query_cy = self.cells(query_x, query_y)
+        yield from cell_pairs(query_cx, query_cy, self.rows, self.cell_start, self.order)
+
+
+class TetraView:
+    """Read-only Tetra-like handle onto one row of a TetraSchool, used for drawing"""
+
+    def __init__(self, school, index):
+        self.school = school
+        self.index = index
+
+    @property
+    def x(self):
+        return self.school.x[self.index]
+
+    @property
+    def y(self):
+        return self.school.y[self.index]
+
+    @property
+    def rect(self):
+        return pygame.Rect(self.x, self.y, CREATURE_SIZE_X, CREATURE_SIZE_Y)
+
+    @property
+    def direction(self):
+        return tuple(self.school.direction[self.index])
+
+    @property
+    def color(self):
+        return tuple(int(c) for c in self.school.color[self.index])
+
+    @property
+    def hunger(self):
+        return self.school.hunger[self.index]
+
+    @property
+    def max_speed(self):
+        return self.school.max_speed[self.index]
+
+    @property
+    def current_speed(self):
+        return self.school.current_speed[self.index]
+
+    @property
+    def isAlive(self):
+        return bool(self.school.is_alive[self.index])
+
+    @property
+    def nearest_neighbor(self):
+        neighbor = self.school.nearest[self.index]
+        return self.school.views[neighbor] if neighbor >= 0 else None
+
+    @property
+    def nearest_distance(self):
+        return self.school.nearest_distance[self.index]
+
+
+class TetraSchool:
+    """Whole population stored as arrays, moved one tick at a time with batched Tetra rules"""
+
+    def __init__(self, count, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.count = count
+        self.hunger_decay_base = constants.HUNGER_DECAY_BASE
+
+        self.x = self.rng.integers(constants.SWIM_ZONE_LEFT, constants.SWIM_ZONE_RIGHT - CREATURE_SIZE_X, count, endpoint=True).astype(float)
+        self.y = self.rng.integers(constants.SWIM_ZONE_TOP, constants.SWIM_ZONE_BOTTOM - CREATURE_SIZE_Y, count, endpoint=True).astype(float)
+        self.direction = DIRECTIONS[self.rng.integers(0, len(DIRECTIONS), count)]
+        self.color = np.column_stack((
+            self.rng.integers(0, 40, count, endpoint=True),
+            self.rng.integers(125, 165, count, endpoint=True),
+            self.rng.integers(215, 255, count, endpoint=True),
+        ))
+        self.max_speed = constants.CREATURE_SPEED * self.rng.uniform(*constants.MAX_SPEED_RANGE, count)
+        self.current_speed = self.max_speed.copy()
+        self.hunger = np.full(count, 50.0)
+        self.is_alive = np.ones(count, dtype=bool)
+
+        # Dead fish at rest on the floor or the pile; they drop out of neighbor and
+        # collision lookups and Game bakes settled_rects into its background
+        self.settled = np.zeros(count, dtype=bool)
+        self.settled_rects = []
+        self.seabed_top = np.inf
+        # Only changed by settle(), so neither is rebuilt on ticks where nothing settles
+        self.seabed_cells = StaticCells(CELL_SIZE, constants.SCREEN_WIDTH, constants.SCREEN_HEIGHT)
+        self.active = np.arange(count)
+
+        # Index of each fish's nearest neighbor, -1 until it has been looked up
+        self.nearest = np.full(count, -1, dtype=np.int64)
+        self.nearest_distance = np.full(count, np.inf)
+
+        self.views = [TetraView(self, i) for i in range(count)]
+
+        # Candidate pairs examined, read and reset by the Profiler like Tetra's counters
+        self.distance_checks = 0
+        self.collision_checks = 0
+        # Live fish turned around by a collision, read and reset by Telemetry like Tetra's
+        self.collision_reversals = 0
+
+    def draw_layout(self, palette_step):
+        """Rects and palette-snapped colors for every unsettled fish, matching Game.creature_color"""
+        active = self.active
+        white_transition = 255 * (1 - self.hunger[active] / 100)
+        colors = (self.color[active] + white_transition[:, None]).astype(np.int64)
+        colors = np.minimum(255, colors // palette_step * palette_step + palette_step // 2)
+        colors[~self.is_alive[active]] = 255
+
+        rects = [pygame.Rect(x, y, CREATURE_SIZE_X, CREATURE_SIZE_Y)
+                 for x, y in zip(self.x[active].tolist(), self.y[active].tolist())]
+        return rects, [tuple(color) for color in colors.tolist()]
+
+    def draw_links(self):
+        """(fish, neighbor) positions in draw_layout order, one per live fish's neighbor line"""
+        position = np.full(self.count, -1)
+        position[self.active] = np.arange(len(self.active))
+        fish = self.active[self.is_alive[self.active] & (self.nearest[self.active] >= 0)]
+        neighbors = position[self.nearest[fish]]
+        # Neighbors looked up before they settled are no longer drawn as fish
+        drawn = neighbors >= 0
+        return list(zip(position[fish[drawn]].tolist(), neighbors[drawn].tolist()))
+
+    def health(self, hunger_bins, neighbor_queries):
+        """Telemetry sample of live fish, matching Telemetry.creature_health
+
+        Neighbor distances come from an evenly spaced subset of at most neighbor_queries
+        fish, since the school only keeps them current for fish about to follow one.
+        """
+        swimmers = np.flatnonzero(self.is_alive)
+        bins = np.minimum((self.hunger[swimmers] * hunger_bins / 100).astype(np.int64), hunger_bins - 1)
+        speeds = self.current_speed[swimmers]
+
+        sampled = swimmers[::max(1, -(-len(swimmers) // neighbor_queries))]
+        # Telemetry's lookups are not charged to the Profiler's counters
+        checks = self.distance_checks
+        self.find_nearest_neighbors(sampled)
+        self.distance_checks = checks
+        distances = np.sort(self.nearest_distance[sampled])
+
+        return {
+            "alive": len(swimmers),
+            "hunger_histogram": np.bincount(bins, minlength=hunger_bins).tolist(),
+            "speed_mean": float(speeds.mean()) if len(speeds) else None,
+            "speed_min": float(speeds.min()) if len(speeds) else None,
+            "distances": distances[distances < np.inf].tolist(),
+        }
+
+    def update_hunger_and_speed(self, swimmers):
+        speed_multiplier = self.current_speed[swimmers] / self.max_speed[swimmers]
+        hunger_decay = self.hunger_decay_base * (1 + speed_multiplier)
+        hunger = np.maximum(0, self.hunger[swimmers] - hunger_decay)
+        self.hunger[swimmers] = hunger
+
+        max_speed = self.max_speed[swimmers]
+        speed = np.where(hunger < 30, max_speed * (hunger / 30), max_speed)
+        starved = hunger <= 0
+        speed[starved] = 0
+        self.current_speed[swimmers] = speed
+        self.is_alive[swimmers[starved]] = False
+
+    def find_nearest_neighbors(self, indices):
+        """Fill nearest / nearest_distance for the given fish; ties go to the lower index"""
+        pool = self.active
+        if len(indices) == 0 or len(pool) < 2:
+            return
+
+        # Cells about twice the typical spacing keep each lookup to a few dozen candidates.
+        # A neighbor found within one cell's width is guaranteed to be the true nearest one
+        area = (constants.SWIM_ZONE_RIGHT - constants.SWIM_ZONE_LEFT) * (constants.SWIM_ZONE_BOTTOM - constants.SWIM_ZONE_TOP)
+        cell_size = max(CELL_SIZE, 2 * (area / len(pool)) ** 0.5)
+
+        best = np.full(len(indices), -1, dtype=np.int64)
+        best_distance = np.full(len(indices), np.inf)
+
+        for queries, points in neighbor_pairs(self.x[indices], self.y[indices], self.x[pool], self.y[pool], cell_size):
+            points = pool[points]
+            distances = np.hypot(self.x[indices[queries]] - self.x[points], self.y[indices[queries]] - self.y[points])
+            distances[points == indices[queries]] = np.inf
+            self.distance_checks += len(queries)
+
+            # Closest point per query, taking the lowest index among equal distances
+            starts = np.flatnonzero(np.r_[True, queries[1:] != queries[:-1]])
+            group = queries[starts]
+            group_distance = np.minimum.reduceat(distances, starts)
+            is_closest = distances == np.repeat(group_distance, np.diff(np.r_[starts, len(queries)]))
+            group_point = np.minimum.reduceat(np.where(is_closest, points, self.count), starts)
+
+            better = ((group_distance < best_distance[group])
+                      | ((group_distance == best_distance[group]) & (group_point < best[group])))
+            best[group[better]] = group_point[better]
+            best_distance[group[better]] = group_distance[better]
+
+        # Anything unresolved within a cell's width gets a full scan, a chunk at a time
+        unresolved = np.flatnonzero(best_distance > cell_size)
+        for start in range(0, len(unresolved), 256):
+            chunk = unresolved[start:start + 256]
+            fish = indices[chunk]
+            distances = np.hypot(self.x[fish, None] - self.x[None, pool], self.y[fish, None] - self.y[None, pool])
+            distances[fish[:, None] == pool[None, :]] = np.inf
+            self.distance_checks += distances.size
+            closest = np.argmin(distances, axis=1)
+            best[chunk] = pool[closest]
+            best_distance[chunk] = distances[np.arange(len(fish)), closest]
+
+        self.nearest[indices] = best
+        self.nearest_distance[indices] = best_distance
+
+    def check_collisions_ahead(self, movers, new_x, new_y):
+        """Flag movers whose future rect overlaps any other unsettled fish's current rect"""
+        hits = np.zeros(len(movers), dtype=bool)
+        pool = self.active
+        if len(movers) == 0:
+            return hits
+
+        for queries, points in neighbor_pairs(new_x, new_y, self.x[pool], self.y[pool], CELL_SIZE):
+            points = pool[points]
+            self.collision_checks += len(queries)
+            overlap = ((points != movers[queries])
+                       & (np.abs(new_x[queries] - self.x[points]) < CREATURE_SIZE_X)
+                       & (np.abs(new_y[queries] - self.y[points]) < CREATURE_SIZE_Y))
+            hits[queries[overlap]] = True
+        return hits
+
+    def touches_seabed(self, new_x, new_y):
+        """Flag future rects overlapping a settled fish; only those near the pile are checked"""
+        hits = np.zeros(len(new_x), dtype=bool)
+        near = np.flatnonzero(new_y > self.seabed_top - CREATURE_SIZE_Y)
+        if len(near) == 0:
+            return hits
+
+        for queries, points in self.seabed_cells.pairs(new_x[near], new_y[near]):
+            overlap = ((np.abs(new_x[near[queries]] - self.x[points]) < CREATURE_SIZE_X)
+                       & (np.abs(new_y[near[queries]] - self.y[points]) < CREATURE_SIZE_Y))
+            hits[near[queries[overlap]]] = True
+        return hits
+
+    def jammed(self, corpses, new_x, new_y):
+        """Flag blocked corpses whose every blocker is a corpse that can never get out of the way"""
+        jammed = np.ones(len(corpses), dtype=bool)
+        pool = self.active
+
+        for queries, points in neighbor_pairs(new_x, new_y, self.x[pool], self.y[pool], CELL_SIZE):
+            points = pool[points]
+            corpse = corpses[queries]
+            blocking = ((points != corpse)
+                        & (np.abs(new_x[queries] - self.x[points]) < CREATURE_SIZE_X)
+                        & (np.abs(new_y[queries] - self.y[points]) < CREATURE_SIZE_Y))
+            # Two corpses that each block the other's sinking are stuck for good
+            mutual = (~self.is_alive[points]
+                      & (np.abs(self.x[points] - self.x[corpse]) < CREATURE_SIZE_X)
+                      & (np.abs(self.y[points] + SINK_SPEED - self.y[corpse]) < CREATURE_SIZE_Y))
+            jammed[queries[blocking & ~mutual]] = False
+        return jammed
+
+    def tick(self, track_nearest=False):
+        """Advance every fish by one tick; track_nearest refreshes neighbors for all live fish"""
+        # Settled fish never move again, so everything below only touches the active ones
+        movers = self.active
+        alive = self.is_alive[movers]
+        swimmers = movers[alive]
+        self.update_hunger_and_speed(swimmers)
+
+        if track_nearest:
+            self.find_nearest_neighbors(swimmers)
+
+        # Random turns: some follow their nearest neighbor, the rest pick a new heading
+        turning = swimmers[self.rng.random(len(swimmers)) < constants.TURN_CHANCE]
+        following = self.rng.random(len(turning)) < constants.FOLLOW_CHANCE
+        if len(self.active) < 2:
+            following[:] = False
+
+        followers = turning[following]
+        if len(followers):
+            if not track_nearest:
+                self.find_nearest_neighbors(followers)
+            far = followers[self.nearest_distance[followers] > 30]
+            dx = self.x[self.nearest[far]] - self.x[far]
+            dy = self.y[self.nearest[far]] - self.y[far]
+            distance = np.hypot(dx, dy)
+            self.direction[far] = np.column_stack((dx / distance, dy / distance))
+
+        wanderers = turning[~following]
+        self.direction[wanderers] = DIRECTIONS[self.rng.integers(0, len(DIRECTIONS), len(wanderers))]
+
+        # Dead fish always sink straight down
+        self.direction[movers[~alive]] = (0, 1)
+
+        x = self.x[movers]
+        y = self.y[movers]
+        direction = self.direction[movers]
+        speed = np.where(alive, self.current_speed[movers], SINK_SPEED)
+        new_x = x + direction[:, 0] * speed
+        new_y = y + direction[:, 1] * speed
+
+        # Collisions are judged against where everyone stood at the start of the tick
+        on_seabed = self.touches_seabed(new_x, new_y)
+        hits = on_seabed | self.check_collisions_ahead(movers, new_x, new_y)
+
+        # Blocked corpses settle if they are on the pile or wedged into other corpses
+        stuck = on_seabed & ~alive
+        wedged = np.flatnonzero(hits & ~alive & ~on_seabed)
+        stuck[wedged] = self.jammed(movers[wedged], new_x[wedged], new_y[wedged])
+
+        bounced = hits & alive
+        self.collision_reversals += int(np.count_nonzero(bounced))
+        direction[bounced] = -direction[bounced]
+        new_x[bounced] = x[bounced] + direction[bounced, 0] * speed[bounced]
+        new_y[bounced] = y[bounced] + direction[bounced, 1] * speed[bounced]
+        new_y[hits & ~alive] = y[hits & ~alive]
+
+        right = constants.SWIM_ZONE_RIGHT - CREATURE_SIZE_X
+        bottom = constants.SWIM_ZONE_BOTTOM - CREATURE_SIZE_Y
+
+        inside_x = (constants.SWIM_ZONE_LEFT <= new_x) & (new_x < right)
+        direction[alive & ~inside_x, 0] *= -1
+        x = np.where(inside_x, new_x, np.clip(x, constants.SWIM_ZONE_LEFT, right))
+
+        inside_y = (constants.SWIM_ZONE_TOP <= new_y) & (new_y < bottom)
+        direction[alive & ~inside_y, 1] *= -1
+        y = np.where(alive,
+                     np.where(inside_y, new_y, np.clip(y, constants.SWIM_ZONE_TOP, bottom)),
+                     np.minimum(new_y, bottom))
+
+        self.x[movers] = x
+        self.y[movers] = y
+        self.direction[movers] = direction
+
+        # Corpses on the floor, on the pile or jammed together can never move again
+        newly_settled = movers[~alive & (stuck | (y >= bottom))]
+        if len(newly_settled):
+            self.settle(newly_settled)
+
+    def settle(self, indices):
+        """Move fish onto the seabed: out of the active pool and into the static cell index"""
+        self.settled[indices] = True
+        self.active = np.flatnonzero(~self.settled)
+        self.seabed_top = min(self.seabed_top, self.y[indices].min())
+        self.seabed_cells.add(indices, self.x[indices], self.y[indices])
+        self.settled_rects.extend(pygame.Rect(x, y, CREATURE_SIZE_X, CREATURE_SIZE_Y) for x, y in
+                                  zip(self.x[indices].tolist(), self.y[indices].tolist()))
@@ -0,0 +1,169 @@
+"""Tick-throughput benchmarks for the pond.
+
+Runs Game.update and Game.draw for a range of population sizes on SDL's dummy
+video driver and reports ticks/sec, per-phase time and peak memory.
+
+    python benchmark.py --save baseline.json
+    python benchmark.py --compare baseline.json --threshold 0.1
+"""
+import os
+
+# Must be set before pygame creates a display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import pygame
+
+from main import Game, parse_size
+
+DEFAULT_POPULATIONS = [10, 100, 1000, 10000, 50000]
+
+# (result field, True if bigger is better)
+METRICS = [
+    ("ticks_per_sec", True),
+    ("update_ms", False),
+    ("draw_ms", False),
+    ("peak_memory_bytes", False),
+]
+
+# Run settings that must match the baseline for its numbers to be comparable
+COMPARED_META = ["ticks", "world_size", "seed", "draw"]
+
+def make_game(engine, population, world_size, seed, draw):
+    game = Game(engine, population, headless=not draw, world_size=world_size, seed=seed)
+    game.setup()
+    return game
+
+def time_run(engine, population, ticks, world_size, seed, draw):
+    game = make_game(engine, population, world_size, seed, draw)
+    update_time = 0.0
+    draw_time = 0.0
+
+    for _ in range(ticks):
+        start = time.perf_counter()
+        game.update()
+        update_time += time.perf_counter() - start
+
+        if draw:
+            start = time.perf_counter()
+            game.draw()
+            draw_time += time.perf_counter() - start
+
+    return update_time, draw_time
+
+def measure_peak_memory(engine, population, ticks, world_size, seed, draw):
+    """Peak traced allocation while building the pond and running a few ticks"""
+    tracemalloc.start()
+    try:
+        game = make_game(engine, population, world_size, seed, draw)
+        for _ in range(ticks):
+            game.update()
+            if draw:
+                game.draw()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def run_case(engine, population, ticks, world_size, seed, draw):
+    update_time, draw_time = time_run(engine, population, ticks, world_size, seed, draw)
+    # Tracing slows allocation-heavy code, so memory gets its own short pass
+    peak_memory = measure_peak_memory(engine, population, min(ticks, 5), world_size, seed, draw)
+    total = update_time + draw_time
+
+    return {
+        "engine": engine,
+        "population": population,
+        "ticks": ticks,
+        "ticks_per_sec": ticks / total if total > 0 else float("inf"),
+        "update_ms": update_time / ticks * 1000,
+        "draw_ms": draw_time / ticks * 1000,
+        "peak_memory_bytes": peak_memory,
+    }
+
+def compare(results, baseline, threshold):
+    """Return a description of every metric that got worse by more than threshold"""
+    previous = {(r["engine"], r["population"]): r for r in baseline["results"]}
+    regressions = []
+
+    for result in results:
+        old = previous.get((result["engine"], result["population"]))
+        if old is None:
+            continue
+
+        for metric, higher_is_better in METRICS:
+            before, after = old[metric], result[metric]
+            if before <= 0:
+                continue
+            change = (after - before) / before
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append(f"{result['engine']} x{result['population']}: {metric} "
+                                   f"{before:.4g} -> {after:.4g} ({change:+.1%})")
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pond tick throughput")
+    parser.add_argument("--populations", type=lambda text: [int(n) for n in text.split(",")],
+                        default=DEFAULT_POPULATIONS, help="comma-separated population sizes")
+    parser.add_argument("--engines", type=lambda text: text.split(","), default=["objects", "numpy"],
+                        help="comma-separated engines to run")
+    parser.add_argument("--ticks", type=int, default=50)
+    parser.add_argument("--size", type=parse_size, default=(1920, 1080), help="world size as WIDTHxHEIGHT")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-draw", action="store_true", help="benchmark update only, with no display")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative slowdown, e.g. 0.1")
+    args = parser.parse_args()
+
+    meta = {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "ticks": args.ticks,
+        "world_size": list(args.size),
+        "seed": args.seed,
+        "draw": not args.no_draw,
+    }
+
+    baseline = None
+    if args.compare:
+        # Checked before running so a mismatched baseline fails fast
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        mismatched = [f"{key} {baseline['meta'].get(key)!r} vs {meta[key]!r}"
+                      for key in COMPARED_META if baseline["meta"].get(key) != meta[key]]
+        if mismatched:
+            sys.exit(f"Baseline {args.compare} was run with different settings: {', '.join(mismatched)}")
+
+    results = []
+    print(f"{'engine':>8} {'fish':>7} {'ticks/s':>10} {'update ms':>10} {'draw ms':>10} {'peak MiB':>9}")
+    for engine in args.engines:
+        for population in args.populations:
+            result = run_case(engine, population, args.ticks, args.size, args.seed, not args.no_draw)
+            results.append(result)
+            print(f"{engine:>8} {population:>7} {result['ticks_per_sec']:>10.1f} {result['update_ms']:>10.2f} "
+                  f"{result['draw_ms']:>10.2f} {result['peak_memory_bytes'] / 2**20:>9.1f}", flush=True)
+
+    report = {"meta": meta, "results": results}
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,10 @@
 # constants.py
 import pygame
 
-# Get the screen resolution
-infoObject = pygame.display.Info()
-SCREEN_WIDTH = infoObject.current_w
-SCREEN_HEIGHT = infoObject.current_h
+# World size; Game sets this from the screen resolution, or explicitly when headless.
+# Modules read these through `constants.` so they see the size set at startup
+SCREEN_WIDTH = 1920
+SCREEN_HEIGHT = 1080
 
 # Game Constants
 CELL_SIZE = 20
@@ -12,6 +12,41 @@ CREATURE_SIZE_X = 18
 CREATURE_SIZE_Y = 12
 CREATURE_SPEED = 1
 FPS = 60
+POPULATION = 10
+
+# Behaviour tuning. Like the world size these are read through `constants.`,
+# so a parameter sweep can override them for each run
+HUNGER_DECAY_BASE = 0.01
+MAX_SPEED_RANGE = (0.8, 1.2)
+TURN_CHANCE = 0.02
+FOLLOW_CHANCE = 0.6
+
+# Simulation engine: "objects" moves each Tetra in turn, "numpy" batches the whole school
+ENGINE = "objects"
+
+# Rendering: fish colors are snapped to multiples of PALETTE_STEP so sprites can be
+# cached, and frames with more fish than DIRTY_RECT_LIMIT flip instead of updating rects
+PALETTE_STEP = 16
+DIRTY_RECT_LIMIT = 2000
+
+# Highest time warp reachable with RIGHT when simulating on a worker thread
+MAX_WARP = 1000
+
+# Frames covered by a cProfile capture started from the profiling HUD
+PROFILE_CAPTURE_FRAMES = 300
+
+# Telemetry: a summary record every TELEMETRY_EVERY ticks, with hunger bucketed into
+# TELEMETRY_HUNGER_BINS bins and neighbor distances looked up for at most
+# TELEMETRY_NEIGHBOR_QUERIES fish. Rolling log files are rotated at TELEMETRY_FILE_BYTES
+TELEMETRY_EVERY = 100
+TELEMETRY_HUNGER_BINS = 10
+TELEMETRY_NEIGHBOR_QUERIES = 1000
+TELEMETRY_RING_SIZE = 1000
+TELEMETRY_FILE_BYTES = 10_000_000
+TELEMETRY_FILE_BACKUPS = 3
+
+# Use the SpatialGrid for neighbor and collision queries (False = brute-force scan)
+USE_SPATIAL_GRID = True
 
 # Boundary Constants
 TOP_MARGIN = 50
@@ -20,4 +55,12 @@ BOTTOM_MARGIN = 50
 SWIM_ZONE_TOP = TOP_MARGIN
 SWIM_ZONE_BOTTOM = SCREEN_HEIGHT - BOTTOM_MARGIN
 SWIM_ZONE_LEFT = SIDE_MARGIN
-SWIM_ZONE_RIGHT = SCREEN_WIDTH - SIDE_MARGIN
\ No newline at end of file
+SWIM_ZONE_RIGHT = SCREEN_WIDTH - SIDE_MARGIN
+
+def set_world_size(width, height):
+    """Resize the world and its swim zone; call before any creatures are created"""
+    global SCREEN_WIDTH, SCREEN_HEIGHT, SWIM_ZONE_BOTTOM, SWIM_ZONE_RIGHT
+    SCREEN_WIDTH = width
+    SCREEN_HEIGHT = height
+    SWIM_ZONE_BOTTOM = SCREEN_HEIGHT - BOTTOM_MARGIN
+    SWIM_ZONE_RIGHT = SCREEN_WIDTH - SIDE_MARGIN
@@ -1,10 +1,20 @@
 import pygame 
 import random
-
-pygame.init()
+import argparse
+import time
 
 from constants import *
+import constants
 from Tetra import Tetra
+from SpatialGrid import SpatialGrid
+from Seabed import Seabed
+from Profiler import Profiler
+from SimulationThread import SimulationThread
+from Telemetry import Telemetry, RollingFile
+from Snapshot import save_snapshot, load_snapshot, TickRecorder, TickReplay
+
+# Channel value (0-510 before clamping) -> its palette color, snapped to PALETTE_STEP
+PALETTE = [min(255, value // PALETTE_STEP * PALETTE_STEP + PALETTE_STEP // 2) for value in range(511)]
 
 class CollisionHandler:
     @staticmethod
@@ -47,22 +57,102 @@ class CollisionHandler:
         entity2.direction = (collision_vec.x, collision_vec.y)
 
 class Game:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.FULLSCREEN)
-        pygame.display.set_caption("Grid World")
+    def __init__(self, engine=ENGINE, population=POPULATION, headless=False, world_size=None, seed=None,
+                 profile_log=None, resume=None, snapshot=None, snapshot_every=0, record=None, replay=None,
+                 threaded=False, warp=1, telemetry=None):
+        self.headless = headless
+        self.seed = seed
+        if seed is not None:
+            random.seed(seed)
+
+        if headless:
+            # No display at all: the world is whatever size we were given
+            self.screen = None
+            if world_size is not None:
+                constants.set_world_size(*world_size)
+        else:
+            pygame.init()
+            if world_size is None:
+                info = pygame.display.Info()
+                world_size = (info.current_w, info.current_h)
+            constants.set_world_size(*world_size)
+            self.screen = pygame.display.set_mode((constants.SCREEN_WIDTH, constants.SCREEN_HEIGHT), pygame.FULLSCREEN)
+            pygame.display.set_caption("Grid World")
+
         self.clock = pygame.time.Clock()
         self.creatures = []
+        # Every fish in spawn order, including those retired to the seabed
+        self.all_fish = []
+        self.seabed = Seabed()
+        self.grid = SpatialGrid() if USE_SPATIAL_GRID else None
+        self.engine = engine
+        self.population = population
+        self.school = None
         self.running = True
         self.is_fullscreen = True
         self.show_connections = False
         self.collision_handler = CollisionHandler()
+        self.profiler = Profiler(profile_log)
+
+        # Saving, resuming and replaying runs
+        self.tick = 0
+        self.resume_path = resume
+        self.snapshot_path = snapshot
+        self.snapshot_every = snapshot_every
+        self.record_path = record
+        self.recorder = None
+        self.replay_path = replay
+        self.replay = None
+        self.replay_speed = 1
+
+        # Simulating on a worker thread at FPS * warp ticks per second
+        self.threaded = threaded
+        self.warp = max(1, min(MAX_WARP, warp))
+        self.simulation = None
+
+        # Population health records streamed to pluggable sinks
+        self.telemetry = telemetry
+
+        # Rendering caches: static scene, one sprite per palette color, last frame's fish rects
+        self.background = None
+        self.sprites = {}
+        self.drawn_rects = []
+        self.full_redraw = True
+        self.rasterized_corpses = 0
 
     def setup(self):
-        for _ in range(10):
-            x = random.randint(SWIM_ZONE_LEFT, SWIM_ZONE_RIGHT - CREATURE_SIZE_X)
-            y = random.randint(SWIM_ZONE_TOP, SWIM_ZONE_BOTTOM - CREATURE_SIZE_Y)
-            new_tetra = Tetra(x, y, self.creatures)
+        if self.replay_path is not None:
+            self.replay = TickReplay(self.replay_path)
+            constants.set_world_size(*self.replay.world_size)
+            self.creatures = self.replay.make_fish()
+            self.all_fish = self.creatures
+            return
+
+        if self.resume_path is not None:
+            load_snapshot(self, self.resume_path)
+        else:
+            self.spawn()
+
+        if self.record_path is not None:
+            self.recorder = TickRecorder(self.record_path, self)
+        if self.telemetry is not None:
+            self.telemetry.start(self)
+
+    def spawn(self):
+        if self.engine == "numpy":
+            # Imported here so the default engine runs without NumPy installed
+            from TetraSchool import TetraSchool
+            self.school = TetraSchool(self.population, seed=self.seed)
+            self.creatures = self.school.views
+            self.all_fish = self.creatures
+            return
+
+        for _ in range(self.population):
+            x = random.randint(constants.SWIM_ZONE_LEFT, constants.SWIM_ZONE_RIGHT - CREATURE_SIZE_X)
+            y = random.randint(constants.SWIM_ZONE_TOP, constants.SWIM_ZONE_BOTTOM - CREATURE_SIZE_Y)
+            new_tetra = Tetra(x, y, self.creatures, self.grid, self.seabed)
             self.creatures.append(new_tetra)
+            self.all_fish.append(new_tetra)
 
     def handle_events(self):
         for event in pygame.event.get():
@@ -74,75 +164,348 @@ class Game:
                 elif event.key == pygame.K_f:
                     self.is_fullscreen = not self.is_fullscreen
                     if self.is_fullscreen:
-                        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.FULLSCREEN)
+                        self.screen = pygame.display.set_mode((constants.SCREEN_WIDTH, constants.SCREEN_HEIGHT), pygame.FULLSCREEN)
                     else:
-                        self.screen = pygame.display.set_mode((SCREEN_WIDTH - 100, SCREEN_HEIGHT - 100))
+                        self.screen = pygame.display.set_mode((constants.SCREEN_WIDTH - 100, constants.SCREEN_HEIGHT - 100))
+                    self.background = None
                 elif event.key == pygame.K_l:
                     self.show_connections = not self.show_connections
+                    # Lines can be anywhere, so the frame after toggling repaints everything
+                    self.full_redraw = True
+                elif event.key == pygame.K_p:
+                    self.profiler.show_hud = not self.profiler.show_hud
+                elif event.key == pygame.K_c:
+                    self.profiler.start_capture()
+                elif event.key == pygame.K_s and self.replay is None:
+                    if self.simulation is not None:
+                        # Saved between ticks so the worker never writes a half-moved pond
+                        self.simulation.call(self.write_snapshot)
+                    else:
+                        self.write_snapshot()
+                elif event.key == pygame.K_RIGHT:
+                    if self.simulation is not None:
+                        self.simulation.warp = min(MAX_WARP, self.simulation.warp * 10)
+                    else:
+                        self.replay_speed *= 2
+                elif event.key == pygame.K_LEFT:
+                    if self.simulation is not None:
+                        self.simulation.warp = max(1, self.simulation.warp // 10)
+                    else:
+                        self.replay_speed = max(1, self.replay_speed // 2)
 
     def update(self):
-        for creature in self.creatures:
-            creature.move()
+        if self.replay is not None:
+            # Fast-forwarding seeks past the skipped ticks instead of reading them
+            self.tick = self.replay.advance(self.creatures, self.replay_speed)
+            return
+
+        if self.school is not None:
+            self.school.tick(track_nearest=self.show_connections)
+        else:
+            if self.grid is not None:
+                self.grid.rebuild(self.creatures)
+
+            settled = []
+            for creature in self.creatures:
+                creature.move()
+                if self.grid is not None:
+                    # Keep the grid current so later fish see this one's new position
+                    self.grid.update(creature)
+                if creature.settled:
+                    settled.append(creature)
+
+            if settled:
+                self.retire(settled)
+
+        self.tick += 1
+        if self.recorder is not None:
+            self.recorder.record(self)
+        if self.telemetry is not None:
+            self.telemetry.tick(self)
+        if self.snapshot_every and self.tick % self.snapshot_every == 0:
+            self.write_snapshot()
+
+    def retire(self, settled):
+        """Move corpses that have come to rest out of the creature list and onto the seabed"""
+        for creature in settled:
+            self.seabed.add(creature)
+
+        # Filtered in place: every Tetra holds this same list as all_tetras
+        self.creatures[:] = [creature for creature in self.creatures if not creature.settled]
+
+    def settled_rects(self, start):
+        """Rects of fish that settled after the first start of them"""
+        if self.school is not None:
+            return self.school.settled_rects[start:]
+        return [fish.rect for fish in self.seabed.fish[start:]]
+
+    def write_snapshot(self):
+        path = self.snapshot_path or f"pond-{self.tick}.snap"
+        save_snapshot(self, path)
+
+    def close(self):
+        self.profiler.close()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.replay is not None:
+            self.replay.close()
+        if self.telemetry is not None:
+            self.telemetry.close()
+
+    def build_background(self):
+        """Render the static scene once; fish are erased by copying from it"""
+        background = pygame.Surface(self.screen.get_size())
 
-    def draw(self):
         # Fill screen with black
-        self.screen.fill((0, 0, 0))
+        background.fill((0, 0, 0))
 
         # Define colors
         DARK_BLUE = (23, 30, 230)
         LIGHT_BLUE = (135, 206, 235)
         
         # Draw light blue above swim zone
-        pygame.draw.rect(self.screen, LIGHT_BLUE, 
-                        (SWIM_ZONE_LEFT, 0, 
-                         SWIM_ZONE_RIGHT - SWIM_ZONE_LEFT, SWIM_ZONE_TOP))
+        pygame.draw.rect(background, LIGHT_BLUE, 
+                        (constants.SWIM_ZONE_LEFT, 0, 
+                         constants.SWIM_ZONE_RIGHT - constants.SWIM_ZONE_LEFT, constants.SWIM_ZONE_TOP))
         
         # Draw dark blue swimming zone
-        pygame.draw.rect(self.screen, DARK_BLUE, 
-                        (SWIM_ZONE_LEFT, SWIM_ZONE_TOP,
-                         SWIM_ZONE_RIGHT - SWIM_ZONE_LEFT, 
-                         SWIM_ZONE_BOTTOM - SWIM_ZONE_TOP))
+        pygame.draw.rect(background, DARK_BLUE, 
+                        (constants.SWIM_ZONE_LEFT, constants.SWIM_ZONE_TOP,
+                         constants.SWIM_ZONE_RIGHT - constants.SWIM_ZONE_LEFT, 
+                         constants.SWIM_ZONE_BOTTOM - constants.SWIM_ZONE_TOP))
+
+        return background.convert()
+
+    def creature_color(self, creature):
+        """Hunger-faded color snapped to the sprite palette"""
+        if not creature.isAlive:
+            return (255, 255, 255)  # White color for dead fish
+
+        hunger_factor = creature.hunger / 100
+        base_color = creature.color
+        
+        white_transition = 255 * (1 - hunger_factor)
+        
+        return (
+            PALETTE[int(base_color[0] + white_transition)],
+            PALETTE[int(base_color[1] + white_transition)],
+            PALETTE[int(base_color[2] + white_transition)]
+        )
+
+    def creature_layout(self):
+        """Rects and palette colors for every creature, in drawing order"""
+        if self.school is not None:
+            return self.school.draw_layout(PALETTE_STEP)
+
+        rects = [creature.rect.copy() for creature in self.creatures]
+        colors = [self.creature_color(creature) for creature in self.creatures]
+        return rects, colors
+
+    def sprite(self, color):
+        sprite = self.sprites.get(color)
+        if sprite is None:
+            sprite = pygame.Surface((CREATURE_SIZE_X, CREATURE_SIZE_Y)).convert()
+            sprite.fill(color)
+            self.sprites[color] = sprite
+        return sprite
+
+    def connection_links(self):
+        """(fish, neighbor) indices into creature_layout's rects, one per connection line"""
+        if self.school is not None:
+            return self.school.draw_links()
+
+        position = {creature: index for index, creature in enumerate(self.creatures)}
+        return [(index, position[creature.nearest_neighbor]) for index, creature in enumerate(self.creatures)
+                if creature.isAlive and creature.nearest_neighbor in position]
+
+    def draw(self):
+        rects, colors = self.creature_layout()
+        links = self.connection_links() if self.show_connections else []
+        self.render(rects, colors, links, self.settled_rects)
+
+    def draw_frame(self, previous, latest):
+        """Draw a frame published by the simulation thread, eased in from the one before"""
+        rects = latest.rects_at(previous, time.perf_counter())
+        corpses = self.simulation.corpses
+        self.render(rects, list(latest.colors), latest.links, lambda start: corpses[start:latest.corpses])
+
+    def render(self, rects, colors, links, settled_rects):
+        """Paint fish at rects, with lines between the rects paired in links
+
+        settled_rects(start) gives the corpses settled after the first start of them.
+        """
+        if self.background is None:
+            self.background = self.build_background()
+            self.rasterized_corpses = 0
+            self.full_redraw = True
+
+        # Settled corpses never move again, so they are baked into the background
+        corpses = settled_rects(self.rasterized_corpses)
+        if corpses:
+            corpse_sprite = self.sprite((255, 255, 255))
+            self.background.blits([(corpse_sprite, rect) for rect in corpses], doreturn=False)
+            self.rasterized_corpses += len(corpses)
+            # Repaint them from the background along with last frame's fish
+            self.drawn_rects.extend(corpses)
+
+        # Connection lines are not tracked as dirty regions, so they force full frames
+        full_redraw = self.full_redraw or self.show_connections
+
+        if full_redraw:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            # Erase last frame's fish by restoring the background underneath them
+            self.screen.blits([(self.background, rect, rect) for rect in self.drawn_rects], doreturn=False)
 
         # Draw creatures
-        for creature in self.creatures:
-            if not creature.isAlive:
-                color = (255, 255, 255)  # White color for dead fish
-            else:
-                hunger_factor = creature.hunger / 100
-                base_color = creature.color
-                
-                white_transition = 255 * (1 - hunger_factor)
-                
-                color = (
-                    min(255, int(base_color[0] + white_transition)),
-                    min(255, int(base_color[1] + white_transition)),
-                    min(255, int(base_color[2] + white_transition))
-                )
-            
-            pygame.draw.rect(self.screen, color, creature.rect)
-            
-            if self.show_connections and creature.nearest_neighbor and creature.isAlive:
-                start_pos = (creature.x + CREATURE_SIZE_X//2, creature.y + CREATURE_SIZE_Y//2)
-                end_pos = (creature.nearest_neighbor.x + CREATURE_SIZE_X//2, 
-                          creature.nearest_neighbor.y + CREATURE_SIZE_Y//2)
-                pygame.draw.line(self.screen, (255, 255, 255), start_pos, end_pos, 1)
-
-        pygame.display.flip()
+        self.screen.blits([(self.sprite(color), rect) for color, rect in zip(colors, rects)], doreturn=False)
+
+        # Drawn between the rects themselves, so lines stay on eased fish
+        for fish, neighbor in links:
+            pygame.draw.line(self.screen, (255, 255, 255), rects[fish].center, rects[neighbor].center, 1)
+
+        if self.profiler.show_hud:
+            # Tracked like a fish rect so the next frame erases it
+            rects.append(self.profiler.draw_hud(self.screen))
+
+        if full_redraw or len(rects) > DIRTY_RECT_LIMIT:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.drawn_rects + rects)
+
+        self.drawn_rects = rects
+        self.full_redraw = False
+
+    def counter_source(self):
+        """Whatever holds the distance/collision check counters for the active engine"""
+        return self.school if self.school is not None else Tetra
 
     def run(self):
         self.setup()
         
-        while self.running:
-            self.handle_events()
-            self.update()
-            self.draw()
-            self.clock.tick(FPS)
+        # Logs, recordings and telemetry are closed even if the simulation raises
+        try:
+            if self.threaded:
+                self.run_threaded()
+
+            while self.running:
+                self.profiler.start_phase("events")
+                self.handle_events()
+                self.profiler.end_phase("events")
+
+                self.profiler.start_phase("update")
+                self.update()
+                self.profiler.end_phase("update")
+
+                self.profiler.start_phase("draw")
+                self.draw()
+                self.profiler.end_phase("draw")
+
+                self.profiler.end_frame(self.counter_source(), len(self.creatures))
+                self.clock.tick(FPS)
+        finally:
+            self.close()
+            pygame.quit()
 
-        pygame.quit()
+    def run_threaded(self):
+        """Simulate on a worker thread while this one only handles events and draws, until quit"""
+        self.simulation = SimulationThread(self, self.warp)
+        # cProfile only sees the thread that enabled it, so captures run on the worker
+        self.profiler.run_capture = self.simulation.call
+        self.simulation.start()
+
+        try:
+            while self.running:
+                self.profiler.start_phase("events")
+                self.handle_events()
+                self.profiler.end_phase("events")
+
+                previous, latest = self.simulation.frames()
+                if latest is not None:
+                    self.profiler.start_phase("draw")
+                    self.draw_frame(previous, latest)
+                    self.profiler.end_phase("draw")
+
+                    # The worker timed its own last batch of ticks
+                    self.profiler.add_phase("update", latest.update_time)
+                    self.profiler.end_frame(latest, len(latest.positions))
+                self.clock.tick(FPS)
+        finally:
+            self.simulation.stop()
+
+    def run_headless(self, ticks):
+        """Advance the simulation a fixed number of ticks with no window or frame cap"""
+        self.setup()
+
+        try:
+            for _ in range(ticks):
+                self.profiler.start_phase("update")
+                self.update()
+                self.profiler.end_phase("update")
+                self.profiler.end_frame(self.counter_source(), len(self.creatures))
+
+            if self.snapshot_path is not None:
+                self.write_snapshot()
+        finally:
+            self.close()
+
+def parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+def parse_positive(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, not {text}")
+    return value
 
 def main():
-    game = Game()
-    game.run()
+    parser = argparse.ArgumentParser(description="Tetra pond simulation")
+    parser.add_argument("--headless", action="store_true", help="simulate without opening a window")
+    parser.add_argument("--ticks", type=int, default=10000, help="ticks to simulate when headless")
+    parser.add_argument("--size", type=parse_size, help="world size as WIDTHxHEIGHT (default: screen resolution, or 1920x1080 headless)")
+    parser.add_argument("--seed", type=int, help="seed for a reproducible run")
+    parser.add_argument("--population", type=int, default=POPULATION)
+    parser.add_argument("--engine", choices=["objects", "numpy"], default=ENGINE)
+    parser.add_argument("--profile-log", help="stream per-frame timings to this file (.csv, otherwise JSON lines)")
+    parser.add_argument("--resume", help="start from a saved snapshot instead of a fresh pond, in the engine that saved it")
+    parser.add_argument("--snapshot", help="snapshot file written by S, --snapshot-every and at the end of headless runs")
+    parser.add_argument("--snapshot-every", type=int, default=0, help="save a snapshot every N ticks")
+    parser.add_argument("--record", help="append every tick to this stream file")
+    parser.add_argument("--replay", help="play back a recorded stream (LEFT/RIGHT change speed)")
+    parser.add_argument("--threaded", action="store_true", help="simulate on a worker thread, drawing its latest state")
+    parser.add_argument("--warp", type=int, default=1, help=f"with --threaded, run FPS x WARP ticks per second, up to {MAX_WARP} (LEFT/RIGHT divide or multiply by 10)")
+    parser.add_argument("--telemetry", help="stream population telemetry to this rolling JSON-lines file")
+    parser.add_argument("--telemetry-every", type=parse_positive, default=TELEMETRY_EVERY, help="ticks between telemetry records")
+    args = parser.parse_args()
+
+    # A headless run has no display to replay onto or draw a worker's frames with
+    if args.headless:
+        for option, given in (("--replay", args.replay is not None), ("--threaded", args.threaded),
+                              ("--warp", args.warp != 1)):
+            if given:
+                parser.error(f"{option} cannot be used with --headless")
+
+    telemetry = None
+    if args.telemetry is not None:
+        telemetry = Telemetry([RollingFile(args.telemetry)], args.telemetry_every)
+
+    if args.headless:
+        game = Game(args.engine, args.population, headless=True, world_size=args.size, seed=args.seed,
+                    profile_log=args.profile_log, resume=args.resume, snapshot=args.snapshot,
+                    snapshot_every=args.snapshot_every, record=args.record, telemetry=telemetry)
+        start = time.perf_counter()
+        game.run_headless(args.ticks)
+        elapsed = time.perf_counter() - start
+        alive = sum(1 for creature in game.all_fish if creature.isAlive)
+        print(f"{args.ticks} ticks in {elapsed:.2f}s ({args.ticks / elapsed:.0f} ticks/s), "
+              f"{alive}/{len(game.all_fish)} alive")
+    else:
+        game = Game(args.engine, args.population, world_size=args.size, seed=args.seed,
+                    profile_log=args.profile_log, resume=args.resume, snapshot=args.snapshot,
+                    snapshot_every=args.snapshot_every, record=args.record, replay=args.replay,
+                    threaded=args.threaded, warp=args.warp, telemetry=telemetry)
+        game.run()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""Parameter sweeps over many headless ponds in parallel.
+
+Every combination of the --param values is run once per seed on a process
+pool. Each finished run is appended to the results file as one JSON line.
+
+    python sweep.py --param hunger_decay_base=0.005,0.01,0.02 \\
+                    --param population=100,1000 --seeds 0-7 --ticks 5000
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import constants
+from main import Game, parse_size, parse_positive
+
+# Sweepable name -> constants attribute it overrides (population is passed to Game)
+TUNABLES = {
+    "hunger_decay_base": "HUNGER_DECAY_BASE",
+    "max_speed_range": "MAX_SPEED_RANGE",
+    "turn_chance": "TURN_CHANCE",
+    "follow_chance": "FOLLOW_CHANCE",
+    "creature_speed": "CREATURE_SPEED",
+}
+DEFAULTS = {name: getattr(constants, attribute) for name, attribute in TUNABLES.items()}
+
+def parse_value(text):
+    """0.01 -> float, 300 -> int, 0.6:1.4 -> (0.6, 1.4) for ranges"""
+    if ":" in text:
+        return tuple(parse_value(part) for part in text.split(":"))
+    number = float(text)
+    return int(number) if number.is_integer() and "." not in text else number
+
+def parse_param(text):
+    name, values = text.split("=", 1)
+    if name not in TUNABLES and name != "population":
+        raise argparse.ArgumentTypeError(f"unknown parameter {name!r}")
+    return name, [parse_value(value) for value in values.split(",")]
+
+def parse_seeds(text):
+    """Comma-separated seeds, where a-b means every seed from a to b inclusive"""
+    seeds = []
+    for part in text.split(","):
+        if "-" in part:
+            first, last = part.split("-")
+            seeds.extend(range(int(first), int(last) + 1))
+        else:
+            seeds.append(int(part))
+    return seeds
+
+def sample(game):
+    """(alive count, mean nearest-neighbor distance of live fish or None)"""
+    if game.school is not None:
+        school = game.school
+        swimmers = school.is_alive.nonzero()[0]
+        school.find_nearest_neighbors(swimmers)
+        distances = school.nearest_distance[swimmers]
+        distances = distances[distances < float("inf")].tolist()
+        alive = len(swimmers)
+    else:
+        distances = [c.nearest_distance for c in game.creatures if c.isAlive and c.nearest_distance < float("inf")]
+        alive = sum(1 for c in game.creatures if c.isAlive)
+
+    return alive, (sum(distances) / len(distances) if distances else None)
+
+def count_alive(game):
+    if game.school is not None:
+        return int(game.school.is_alive.sum())
+    return sum(1 for c in game.creatures if c.isAlive)
+
+def run_pond(params, seed, ticks, sample_every, world_size, engine):
+    """Run one pond to extinction or ticks, whichever is first, and summarise it"""
+    for name, value in DEFAULTS.items():
+        setattr(constants, TUNABLES[name], params.get(name, value))
+
+    start = time.perf_counter()
+    game = Game(engine, params.get("population", constants.POPULATION), headless=True,
+                world_size=world_size, seed=seed)
+    game.setup()
+
+    survival = []
+    nearest_distances = []
+    extinction_tick = None
+    tick = 0
+    for tick in range(1, ticks + 1):
+        game.update()
+
+        if tick % sample_every == 0:
+            alive, mean_distance = sample(game)
+            survival.append([tick, alive])
+            if mean_distance is not None:
+                nearest_distances.append(mean_distance)
+        else:
+            alive = count_alive(game)
+
+        if alive == 0:
+            extinction_tick = tick
+            if not survival or survival[-1][0] != tick:
+                survival.append([tick, 0])
+            break
+
+    return {
+        "params": params,
+        "seed": seed,
+        "ticks_run": tick,
+        "survival": survival,
+        "time_to_extinction": extinction_tick,
+        "mean_nearest_distance": sum(nearest_distances) / len(nearest_distances) if nearest_distances else None,
+        "elapsed": time.perf_counter() - start,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a grid of headless ponds across all cores")
+    parser.add_argument("--param", type=parse_param, action="append", default=[],
+                        help=f"name=v1,v2,... for one of: population, {', '.join(TUNABLES)}")
+    parser.add_argument("--seeds", type=parse_seeds, default=[0], help="e.g. 0-9 or 1,5,7")
+    parser.add_argument("--ticks", type=int, default=10000, help="maximum ticks per run")
+    parser.add_argument("--sample-every", type=parse_positive, default=100, help="ticks between survival samples")
+    parser.add_argument("--size", type=parse_size, default=(1920, 1080), help="world size as WIDTHxHEIGHT")
+    parser.add_argument("--engine", choices=["objects", "numpy"], default=constants.ENGINE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", default="sweep-results.jsonl")
+    args = parser.parse_args()
+
+    names = [name for name, _ in args.param]
+    grid = [dict(zip(names, values)) for values in itertools.product(*(values for _, values in args.param))]
+    runs = [(params, seed) for params in grid for seed in args.seeds]
+    print(f"{len(runs)} runs ({len(grid)} parameter sets x {len(args.seeds)} seeds) on {args.workers} workers")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(args.workers) as pool, open(args.output, "w") as results:
+        futures = [pool.submit(run_pond, params, seed, args.ticks, args.sample_every, args.size, args.engine)
+                   for params, seed in runs]
+
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results.write(json.dumps(result) + "\n")
+            results.flush()
+            print(f"[{done}/{len(runs)}] {result['params']} seed={result['seed']} "
+                  f"extinct at {result['time_to_extinction']} ({result['elapsed']:.1f}s)", flush=True)
+
+    print(f"Finished in {time.perf_counter() - start:.1f}s, results in {args.output}")
+
+if __name__ == "__main__":
+    main()
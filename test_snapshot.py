@@ -0,0 +1,35 @@
+import pytest
+
+import constants
+from main import Game
+from Snapshot import save_snapshot, population_columns
+
+WORLD_SIZE = (500, 300)
+OTHER_ENGINE = {"objects": "numpy", "numpy": "objects"}
+
+@pytest.mark.parametrize("engine", ["objects", "numpy"])
+def test_resume_matches_uninterrupted_run(engine, tmp_path, monkeypatch):
+    if engine == "numpy":
+        pytest.importorskip("numpy")
+    path = str(tmp_path / "pond.snap")
+
+    original = Game(engine, 200, headless=True, world_size=WORLD_SIZE, seed=5)
+    original.setup()
+    for _ in range(300):
+        original.update()
+    save_snapshot(original, path)
+    for _ in range(400):
+        original.update()
+
+    # Neither the engine asked for nor the current tunables should change a resumed pond
+    monkeypatch.setattr(constants, "HUNGER_DECAY_BASE", constants.HUNGER_DECAY_BASE * 5)
+    resumed = Game(OTHER_ENGINE[engine], 200, headless=True, world_size=WORLD_SIZE, resume=path)
+    resumed.setup()
+    assert resumed.engine == engine
+    for _ in range(400):
+        resumed.update()
+
+    assert resumed.tick == original.tick
+    assert population_columns(resumed) == population_columns(original)
+    if engine == "objects":
+        assert [fish.rect for fish in resumed.all_fish] == [fish.rect for fish in original.all_fish]